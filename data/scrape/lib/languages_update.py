@@ -8,72 +8,105 @@ in each language's TSV file. Script entries are also updated
 to reflect such that script key entries match ISO 15924 aliases.
 """
 
-import collections
+import argparse
+import concurrent.futures
+import functools
 import logging
 import json
-import operator
 import os
+import sys
 
-from typing import Dict, DefaultDict, Optional
+from typing import Dict, List, Optional, Set
 
 import unicodedataplus  # type: ignore
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
 
 LIB_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
 LANGUAGES_PATH = os.path.join(LIB_DIRECTORY, "languages.json")
 SCRAPE_DIRECTORY = os.path.dirname(LIB_DIRECTORY)
 TSV_DIRECTORY = os.path.join(SCRAPE_DIRECTORY, "tsv")
 
+_SCRIPT_ALIASES = unicodedataplus.property_value_aliases["script"]
+# The script names in Unicode data tables have underscores instead of
+# whitespace, whereas languages.json uses whitespace.
+_SCRIPT_DISPLAY = {name: name.replace("_", " ") for name in _SCRIPT_ALIASES}
+_SCRIPT_INTERNAL = {display: name for name, display in _SCRIPT_DISPLAY.items()}
+
+
+class _ScriptCache(Dict[str, str]):
+    """Memoizes the script of each character as it is first looked up.
+
+    A table precomputed over all of Unicode is no faster to query and takes
+    a quarter of a second to build, whereas the handful of characters a TSV
+    actually uses are filled in here on demand. Script names are interned so
+    that characters of the same script share a single string, which makes
+    comparing and hashing them cheaper.
+    """
+
+    def __missing__(self, char: str) -> str:
+        script = self[char] = sys.intern(unicodedataplus.script(char))
+        return script
+
+
+_SCRIPTS = _ScriptCache()
+
 
 def _detect_best_script_name(
     word: str,
     strict: bool = True,
 ) -> Optional[str]:
     """Returns the most likely script name (rather than ISO 15924 code) the
-    word belongs to along with the corresponding confidence expressed as a
-    maximum likelihood estimate computed over the `word` sample. If `strict`
-    is enabled, then all the characters must belong to the same script and
-    `None` is returned on failure.
+    word belongs to, i.e., the script of the plurality of its characters.
+    If `strict` is enabled, then all the characters must belong to the same
+    script and `None` is returned on failure.
 
-    Example: "ژۇرنال" -> ("Arabic", 1.0).
+    Example: "ژۇرنال" -> "Arabic".
     """
-    script_counts: DefaultDict[
-        str,
-        float,
-    ] = collections.defaultdict(float)
+    # The script names in Unicode data tables have underscores instead of
+    # whitespace to enable parsing. See:
+    # https://www.unicode.org/Public/13.0.0/ucd/Scripts.txt
+    # ASCII letters are all Latin, which is quicker to check than looking up
+    # each character; other ASCII characters (digits, hyphens, etc.) are
+    # "Common".
+    if word.isascii() and word.isalpha():
+        return "Latin"
+    if strict:
+        # Gives up as soon as a character disagrees with the first one.
+        chars = iter(word)
+        first = next(chars, None)
+        if first is None:
+            return None
+        script = _SCRIPTS[first]
+        for char in chars:
+            if _SCRIPTS[char] != script:
+                return None
+        return script
+    counts: Dict[str, int] = {}
     for char in word:
-        script_counts[unicodedataplus.script(char)] += 1.0
-    script_probs = [
-        (
-            s,
-            script_counts[s] / len(word),
-        )
-        for s in script_counts
-    ]
-    script_probs.sort(
-        key=operator.itemgetter(1),
-        reverse=True,
-    )
-    if strict and len(script_probs) != 1:
-        return None
-    else:
-        # The script names in Unicode data tables have underscores instead of
-        # whitespace to enable parsing. See:
-        # https://www.unicode.org/Public/13.0.0/ucd/Scripts.txt
-        return script_probs[0][0]
+        script = _SCRIPTS[char]
+        counts[script] = counts.get(script, 0) + 1
+    # Dictionaries keep insertion order, so ties are broken in favor of the
+    # script seen first.
+    return max(counts, key=counts.__getitem__) if counts else None
 
 
+@functools.lru_cache(maxsize=None)
 def _get_alias(
     value: str,
 ) -> str:
     """Takes a script ID string from _detect_best_script_name()
     and returns the ISO 15924 code alias for that script.
 
+    Results are cached since there are only a couple hundred scripts.
+
     Example: "Arabic" -> "arab"
     """
-    script = "".join(
-        unicodedataplus.property_value_aliases["script"][value]
-    ).lower()
+    script = "".join(_SCRIPT_ALIASES[value]).lower()
     # Removes `qaac/qaai` tags from end of script.
     return script.replace("qaac", "").replace("qaai", "")
 
@@ -95,10 +128,7 @@ def _remove_mismatch_ids(
         key,
         value,
     ) in script_dict["script"].items():
-        value = value.replace(
-            " ",
-            "_",
-        )
+        value = _SCRIPT_INTERNAL.get(value, value)
         if _get_alias(value) != key:
             remove.append(key)
     for i in remove:
@@ -106,47 +136,104 @@ def _remove_mismatch_ids(
     return script_dict
 
 
-def main():
-    with open(
-        LANGUAGES_PATH,
-        "r",
-        encoding="utf-8",
-    ) as source:
-        languages = json.load(source)
-    for filename in os.listdir(TSV_DIRECTORY):
-        if filename.endswith(".tsv"):
-            iso639_code = filename[: filename.index("_")]
-            try:
-                lang = languages[iso639_code]
-            except KeyError as key:
-                logging.warning("Key not found: %s", key)
+def _scripts_in_file(
+    path: str,
+    max_unseen_lines: Optional[int] = None,
+) -> List[str]:
+    """Returns the script names of the words in a TSV file, in order of first
+    occurrence. Words mixing several scripts are ignored.
+
+    If `max_unseen_lines` is set, reading stops once that many consecutive
+    words have not revealed a new script.
+    """
+    with open(path, "rb") as source:
+        lines = source.read().split(b"\n")
+    # Words with several pronunciations span several lines; each one only
+    # needs to be decoded and classified once.
+    seen: Set[bytes] = set()
+    # Used as an ordered set.
+    scripts: Dict[Optional[str], None] = {}
+    unseen_lines = 0
+    for line in lines:
+        if not line:
+            continue
+        word = line.partition(b"\t")[0]
+        if word in seen:
+            continue
+        seen.add(word)
+        script = _detect_best_script_name(word.decode("utf-8"))
+        if script in scripts:
+            unseen_lines += 1
+            if max_unseen_lines and unseen_lines > max_unseen_lines:
+                break
+        else:
+            scripts[script] = None
+            unseen_lines = 0
+    return [script for script in scripts if script is not None]
+
+
+def main(args: argparse.Namespace) -> None:
+    # orjson is only used for reading since it cannot reproduce the
+    # four-space indentation languages.json is written with.
+    if orjson:
+        with open(LANGUAGES_PATH, "rb") as source:
+            languages = orjson.loads(source.read())
+    else:
+        with open(
+            LANGUAGES_PATH,
+            "r",
+            encoding="utf-8",
+        ) as source:
+            languages = json.load(source)
+    langs = []
+    paths = []
+    # Only TSVs for languages in languages.json are read at all.
+    with os.scandir(TSV_DIRECTORY) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".tsv"):
+                continue
+            iso639_code = entry.name.split("_", 1)[0]
+            if iso639_code not in languages:
+                logging.warning("Key not found: %s", iso639_code)
                 continue
-            with open(
-                f"{TSV_DIRECTORY}/{filename}", "r", encoding="utf-8"
-            ) as source:
-                for line in source:
-                    if line is not None:
-                        word = line.split(
-                            "\t",
-                            1,
-                        )[0]
-                        script = _detect_best_script_name(word)
-                        if script is not None:
-                            if "script" not in lang:
-                                lang["script"] = {}
-                            # Uses property_value_aliases to get
-                            # ISO-15924 code.
-                            if script not in lang["script"]:
-                                lang["script"][
-                                    _get_alias(script)
-                                ] = script.replace("_", " ")
-                            _remove_mismatch_ids(lang)
-    with open(LANGUAGES_PATH, "w", encoding="utf-8") as sink:
-        json.dump(languages, sink, ensure_ascii=False, indent=4)
+            langs.append(languages[iso639_code])
+            paths.append(entry.path)
+    # The TSV files are independent of each other, so they are read in
+    # parallel and the results merged here in the original order.
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        results = executor.map(
+            functools.partial(
+                _scripts_in_file, max_unseen_lines=args.max_unseen_lines
+            ),
+            paths,
+        )
+        for lang, scripts in zip(langs, results):
+            if not scripts:
+                continue
+            # Uses property_value_aliases to get ISO-15924 code.
+            lang.setdefault("script", {}).update(
+                (_get_alias(script), _SCRIPT_DISPLAY[script])
+                for script in scripts
+            )
+            _remove_mismatch_ids(lang)
+    # Writes to a temporary file first so that languages.json is replaced
+    # atomically and never left half-written.
+    temp_path = f"{LANGUAGES_PATH}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as sink:
+        sink.write(json.dumps(languages, ensure_ascii=False, indent=4))
+    os.replace(temp_path, LANGUAGES_PATH)
 
 
 if __name__ == "__main__":
     logging.basicConfig(
         format="%(filename)s %(levelname)s: %(message)s", level="WARNING"
     )
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--max_unseen_lines",
+        type=int,
+        help="stop reading a TSV once this many consecutive words have "
+        "not revealed a new script; scripts occurring only later in the "
+        "file are then missed",
+    )
+    main(parser.parse_args())
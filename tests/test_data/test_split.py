@@ -2,10 +2,14 @@ import collections
 import json
 import pytest
 import os
+import tempfile
 
 from typing import Set
 
-from data.scrape.lib.languages_update import _detect_best_script_name
+from data.scrape.lib.languages_update import (
+    _detect_best_script_name,
+    _scripts_in_file,
+)
 from data.scrape.lib.split import _generalized_check
 
 _REPO_DIR = os.path.dirname(
@@ -299,3 +303,26 @@ def test_script_detection_basic():
     assert not _detect_best_script_name(text)  # Not allowed in strict mode.
     script = _detect_best_script_name(text, strict=False)
     assert script == "Brahmi"
+    assert _detect_best_script_name("", strict=False) is None
+
+
+def test_scripts_in_file():
+    """Checks that the scripts of a TSV are listed once each, in order of
+    first occurrence, and that mixed-script words are ignored."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = f"{temp_dir}/test.tsv"
+        with open(path, "w", encoding="utf-8") as sink:
+            print("привет\tp r i v e t", file=sink)
+            print("hello\th e l o", file=sink)
+            print("hello\th ə l o", file=sink)
+            print("привет-hello\tp r i v e t", file=sink)
+            print("мир\tm i r", file=sink)
+        assert _scripts_in_file(path) == ["Cyrillic", "Latin"]
+        # Stops before reaching "hello" since neither "мир" nor "дом" adds
+        # a new script.
+        with open(path, "w", encoding="utf-8") as sink:
+            print("привет\tp r i v e t", file=sink)
+            print("мир\tm i r", file=sink)
+            print("дом\td o m", file=sink)
+            print("hello\th e l o", file=sink)
+        assert _scripts_in_file(path, max_unseen_lines=1) == ["Cyrillic"]